@@ -0,0 +1,290 @@
+# _ingest.py
+# Shared ingest and feature-engineering helpers for the data-prep CLIs
+# (data.py, clean_data.py). Keeping the hot-path code here means the
+# pyarrow reader, the numba kernels, and any future tuning land once
+# instead of drifting between the two scripts.
+
+import csv
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# --------- IO ---------
+def _sniff_delimiter(path: str) -> str:
+    """Guess the delimiter from the first 8 KB instead of re-parsing the file."""
+    with open(path, "rb") as fh:
+        sample = fh.read(8192).decode("utf-8-sig", errors="replace")
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return max([",", ";", "\t", "|"], key=sample.count)
+
+
+def smart_read(path: str) -> pd.DataFrame:
+    # Fast path: pyarrow's multithreaded CSV parser, with a delimiter ladder
+    # for the uncommon case where the first guess yields a single column
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        first = None
+        for sep in [",", ";", "\t", "|"]:
+            try:
+                tbl = pacsv.read_csv(path, parse_options=pacsv.ParseOptions(delimiter=sep))
+            except Exception:
+                continue
+            if any(pa.types.is_binary(t) for t in tbl.schema.types):
+                # not valid UTF-8; let the encoding fallbacks decode it
+                first = None
+                break
+            if tbl.num_columns > 1:
+                return tbl.to_pandas()
+            if first is None:
+                first = tbl.to_pandas()
+        if first is not None:
+            return first
+    except ImportError:
+        pass
+    # Fallback: single pandas parse with a sniffed delimiter
+    try:
+        # memory_map lets the parser read the page cache directly instead of
+        # going through buffered file IO
+        df = pd.read_csv(path, sep=_sniff_delimiter(path), engine="c", encoding="utf-8-sig",
+                         on_bad_lines="skip", memory_map=True)
+        if df.shape[1] == 1:  # sniffer guessed wrong
+            for sep in [",", ";", "\t", "|"]:
+                try:
+                    df2 = pd.read_csv(path, sep=sep, engine="python", encoding="utf-8-sig", on_bad_lines="skip")
+                    if df2.shape[1] > 1:
+                        return df2
+                except Exception:
+                    pass
+        return df
+    except Exception:
+        pass
+    # A failed parse on a .csv/.txt is far more likely an encoding problem
+    # than a spreadsheet in disguise; only probe openpyxl for real
+    # spreadsheet extensions (it walks the whole XML tree just to fail)
+    if Path(path).suffix.lower() in (".xlsx", ".xlsm", ".xls"):
+        try:
+            return pd.read_excel(path, engine="openpyxl")
+        except Exception:
+            pass
+    else:
+        for enc in ["latin1", "cp1252"]:
+            try:
+                return pd.read_csv(path, sep=None, engine="python", encoding=enc, on_bad_lines="skip")
+            except Exception:
+                continue
+    raise RuntimeError(f"Could not read file: {path}")
+
+
+# --------- Schema detection ---------
+def _month_start(s: pd.Series) -> pd.Series:
+    # month-start normalization via a direct numpy cast; equivalent to
+    # s.dt.to_period("M").dt.start_time without the Period object round-trip
+    return pd.Series(s.to_numpy().astype("datetime64[M]").astype("datetime64[ns]"), index=s.index)
+
+
+def detect_date_column(df: pd.DataFrame) -> pd.Series:
+    # common candidates
+    for c in ["date", "Date", "period", "month_year", "obs_date", "time", "dt"]:
+        if c in df.columns:
+            s = pd.to_datetime(df[c], errors="coerce")
+            if s.notna().any():
+                return _month_start(s)
+
+    # yyyy-mm in text
+    for c in df.columns:
+        if df[c].dtype == object:
+            smp = df[c].astype(str).head(20)
+            if smp.str.contains(r"^\d{4}[-/]\d{1,2}$").any():
+                s = pd.to_datetime(df[c].astype(str) + "-01", errors="coerce")
+                if s.notna().any():
+                    return _month_start(s)
+
+    # year + month numeric
+    lower = {x.lower(): x for x in df.columns}
+    ycol = next((lower[k] for k in ["year", "yr", "yyyy"] if k in lower), None)
+    mcol = next((lower[k] for k in ["month", "mn", "mm"] if k in lower), None)
+    if ycol and mcol:
+        s = pd.to_datetime({"year": pd.to_numeric(df[ycol], errors="coerce"),
+                            "month": pd.to_numeric(df[mcol], errors="coerce"),
+                            "day": 1}, errors="coerce")
+        if s.notna().any():
+            return _month_start(s)
+
+    # yyyymm int
+    for c in df.columns:
+        vals = pd.to_numeric(df[c], errors="coerce")
+        if vals.notna().any() and vals.between(190001, 210012, inclusive="both").any():
+            # keep the floats: NaN coerces to NaT, while nullable Int64
+            # makes the unit-column assembly raise on pd.NA
+            s = pd.to_datetime({"year": vals // 100, "month": vals % 100, "day": 1}, errors="coerce")
+            if s.notna().any():
+                return _month_start(s)
+
+    return pd.Series(pd.NaT, index=df.index)
+
+
+def build_commodity(df: pd.DataFrame) -> str:
+    for c in ["commodity", "item", "product", "commodity_name"]:
+        if c in df.columns:
+            df[c] = df[c].astype(str)
+            return c
+    # derive from one-hots like commodity_Rice (imported) — single argmax pass
+    # over the numeric flag block instead of a Python lambda per row
+    onehots = [c for c in df.columns if c.lower().startswith("commodity_")]
+    if onehots:
+        active = df[onehots].apply(pd.to_numeric, errors="coerce").to_numpy() == 1.0
+        names = np.array([c.split("commodity_", 1)[-1].strip() for c in onehots], dtype=object)
+        df["commodity"] = np.where(active.any(axis=1), names[active.argmax(axis=1)], "Unknown")
+        df["commodity"] = df["commodity"].astype(str)
+        return "commodity"
+    df["commodity"] = "Commodity"
+    return "commodity"
+
+
+def build_market(df: pd.DataFrame) -> str:
+    for c in ["market", "region", "district", "location", "city", "pop_region", "area", "market_name", "region_name"]:
+        if c in df.columns:
+            # coerce to string to avoid numeric codes being treated as numbers
+            df[c] = df[c].astype(str)
+            return c
+    # derive from one-hots like region_Western Area / market_Freetown — same
+    # vectorized argmax decode as build_commodity, with the prefix stripped once
+    region_oh = [c for c in df.columns if c.lower().startswith(("region_", "market_", "district_"))]
+    if region_oh:
+        def strip_prefix(colname: str) -> str:
+            for pref in ["region_", "market_", "district_"]:
+                if colname.lower().startswith(pref):
+                    return colname[len(pref):]
+            return colname
+        active = df[region_oh].apply(pd.to_numeric, errors="coerce").to_numpy() == 1.0
+        names = np.array([strip_prefix(c) for c in region_oh], dtype=object)
+        df["market"] = np.where(active.any(axis=1), names[active.argmax(axis=1)], "Unknown")
+        df["market"] = df["market"].astype(str)
+        return "market"
+    df["market"] = "All-Markets"
+    return "market"
+
+
+def choose_price(df: pd.DataFrame) -> str:
+    # prefer price_sll if present
+    if "price_sll" in df.columns:
+        return "price_sll"
+    # otherwise any column with "price" but not lag/roll
+    for c in df.columns:
+        lc = c.lower()
+        if "price" in lc and "_lag" not in lc and "_roll" not in lc:
+            return c
+    raise RuntimeError("No price column found (need a column containing 'price').")
+
+
+# --------- Within-group lag/rolling features ---------
+_KERNELS = None
+
+
+def _key_array(s: pd.Series) -> np.ndarray:
+    # categorical keys compare via int codes instead of per-row strings
+    return s.cat.codes.to_numpy() if isinstance(s.dtype, pd.CategoricalDtype) else s.to_numpy()
+
+
+def _group_starts(*key_arrays) -> np.ndarray:
+    """Offsets of group boundaries in already-sorted key columns (plus end sentinel)."""
+    n = len(key_arrays[0])
+    change = np.zeros(n, dtype=bool)
+    change[0] = True
+    for k in key_arrays:
+        a = np.asarray(k)
+        change[1:] |= a[1:] != a[:-1]
+    return np.append(np.flatnonzero(change), n).astype(np.int64)
+
+
+def _lag_kernels():
+    """Numba kernels for within-group shift/rolling over sorted flat arrays.
+
+    Compiled once per process (and cached on disk); returns None when numba
+    is unavailable, in which case callers use the pandas groupby path.
+    """
+    global _KERNELS
+    if _KERNELS is None:
+        try:
+            from numba import njit, prange
+        except ImportError:
+            _KERNELS = False
+        else:
+            @njit(cache=True, fastmath=True, boundscheck=False, nogil=True, parallel=True)
+            def shift_within(values, starts, k):
+                out = np.full_like(values, np.nan)
+                for gi in prange(starts.shape[0] - 1):
+                    s, e = starts[gi], starts[gi + 1]
+                    if k >= 0:
+                        for i in range(s + k, e):
+                            out[i] = values[i - k]
+                    else:
+                        for i in range(s, e + k):
+                            out[i] = values[i - k]
+                return out
+
+            @njit(cache=True, fastmath=True, boundscheck=False, nogil=True, parallel=True)
+            def rollmean_within(values, starts, window, shift):
+                out = np.full_like(values, np.nan)
+                for gi in prange(starts.shape[0] - 1):
+                    s, e = starts[gi], starts[gi + 1]
+                    for i in range(s, e):
+                        lo = i - shift - window + 1
+                        if lo < s:
+                            continue
+                        acc = 0.0
+                        for j in range(lo, i - shift + 1):
+                            acc += values[j]
+                        out[i] = acc / window
+                return out
+
+            _KERNELS = (shift_within, rollmean_within)
+    return _KERNELS or None
+
+
+def lag_features(df: pd.DataFrame, comm_col: str, mkt_col: str, price_col: str,
+                 *, lags=(), rolls=(), targets=()):
+    """Within-(commodity, market) shifts, rolling means, and future targets.
+
+    Expects ``df`` already sorted by (comm_col, mkt_col, date). ``rolls`` is a
+    sequence of (window, shift) pairs — shift=1 excludes the current row for
+    past-only rolling means. Returns three dicts keyed by lag periods,
+    (window, shift) pairs, and target horizons respectively; callers assign
+    the values to whatever column names their output schema uses.
+    """
+    lag_out, roll_out, tgt_out = {}, {}, {}
+    kernels = _lag_kernels()
+    if kernels is not None:
+        # one JIT'd pass over the flat price array per feature, walking
+        # precomputed group boundaries
+        shift_w, roll_w = kernels
+        p = pd.to_numeric(df[price_col], errors="coerce").to_numpy()
+        if p.dtype.kind != "f":
+            p = p.astype(np.float64)
+        starts = _group_starts(_key_array(df[comm_col]), _key_array(df[mkt_col]))
+        for k in lags:
+            lag_out[k] = shift_w(p, starts, k)
+        for w, sh in rolls:
+            roll_out[(w, sh)] = roll_w(p, starts, w, sh)
+        for h in targets:
+            tgt_out[h] = shift_w(p, starts, -h)
+    else:
+        # vectorized groupby shift/rolling, no Python function call per group
+        p = pd.to_numeric(df[price_col], errors="coerce")
+        keys = [df[comm_col], df[mkt_col]]
+        gb = p.groupby(keys, observed=True, sort=False)
+        for k in lags:
+            lag_out[k] = gb.shift(k)
+        for w, sh in rolls:
+            base = gb.shift(sh) if sh else p
+            roll_out[(w, sh)] = (base.groupby(keys, observed=True, sort=False)
+                                 .rolling(w, min_periods=w).mean()
+                                 .reset_index(level=[0, 1], drop=True))
+        for h in targets:
+            tgt_out[h] = gb.shift(-h)
+    return lag_out, roll_out, tgt_out
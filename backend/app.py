@@ -1,11 +1,13 @@
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+import json
 import os
 
 import numpy as np
 import pandas as pd
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 # ---------------- Paths & dataset candidates ----------------
 ROOT = Path(__file__).resolve().parent
@@ -18,6 +20,9 @@ DATA_CANDIDATES = [
     DATA_DIR / "SL_food_prices_cleaned2.xls",
     DATA_DIR / "SL_food_prices_cleaned2.xlsx",
 ]
+# prepared sidecar: skips CSV parsing + column detection on restarts
+PREPARED_PARQUET = DATA_DIR / "prepared.parquet"
+PREPARED_META = DATA_DIR / "prepared.meta.json"
 
 # ---------------- Globals ----------------
 DF: Optional[pd.DataFrame] = None
@@ -26,20 +31,78 @@ PRICE_COL: Optional[str] = None
 REGION_COL: Optional[str] = None            # resolved region/market column (real or synthesized)
 TIDY_COMMODITY_COL: Optional[str] = None
 WIDE_COMMODITY_MAP: Dict[str, str] = {}     # friendly name -> 'commodity_*' column
+WIDE_MASKS: Dict[str, np.ndarray] = {}      # friendly name -> row mask over DF (wide mode)
+REGION_LOOKUP: Dict[str, str] = {}          # normalized input -> canonical category label
+COMMODITY_LOOKUP: Dict[str, str] = {}       # normalized input -> canonical category label (tidy mode)
+SERIES_CACHE: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}  # (commodity, region) -> (dates, prices)
+
+# columnar store (struct-of-arrays): everything the hot path needs, without pandas
+DATES_ARR: Optional[np.ndarray] = None      # datetime64[ns]
+PRICES_ARR: Optional[np.ndarray] = None     # float32
+REGION_CODES: Optional[np.ndarray] = None   # int8 codes into REGION_LABELS
+COMMODITY_CODES: Optional[np.ndarray] = None  # int8 codes into COMMODITY_LABELS (tidy mode)
+REGION_LABELS: List[str] = []
+COMMODITY_LABELS: List[str] = []
+
+HEALTH_PAYLOAD: Dict = {}                   # static part of /health, built once after load
+OPTIONS_PAYLOAD: Dict = {}                  # full /options payload, built once after load
+FORECAST_CACHE: Dict[Tuple[str, str, int], np.ndarray] = {}              # (commodity, region, periods) -> forecast
 
 CANON_REGIONS_ORDER = ["Eastern", "North Western", "Northern", "Southern", "Western Area"]
 CANON_COMMODITIES = ["Fish (bonga)", "Rice (imported)", "Oil (palm)"]
 
 # ---------------- Utils ----------------
+def _columns_to_load(cols: List[str]) -> Tuple[set, Optional[str]]:
+    """Mirror the column-name logic of _detect_columns_and_prepare against the
+    header only, so the full read can prune unused columns. Returns the set of
+    columns to load and the date column (for parse_dates), if identified."""
+    low = [str(c).strip().lower() for c in cols]
+
+    def first(keys):
+        for k in keys:
+            if k in low:
+                return low.index(k)
+        return None
+
+    keep = set()
+    date_col = None
+    i = first(["date", "month", "period", "obs_date"])
+    if i is not None:
+        date_col = cols[i]
+        keep.add(date_col)
+    i = first(["price_sll", "retail_price_sll", "price_slll", "price"])
+    if i is None:
+        i = next((j for j, c in enumerate(low) if "price" in c), None)
+    if i is not None:
+        keep.add(cols[i])
+    i = first(["market", "region", "district", "area", "market_name", "select market", "pop_region"])
+    if i is not None:
+        keep.add(cols[i])
+    keep.update(c for c, l in zip(cols, low) if l.startswith("region_"))
+    i = first(["commodity", "item", "product"])
+    if i is not None:
+        keep.add(cols[i])
+    keep.update(c for c, l in zip(cols, low) if l.startswith("commodity_"))
+    return keep, date_col
+
 def _read_any(p: Path) -> pd.DataFrame:
-    return pd.read_excel(p) if p.suffix.lower() in (".xls", ".xlsx") else pd.read_csv(p, encoding="utf-8")
+    if p.suffix.lower() in (".xls", ".xlsx"):
+        return pd.read_excel(p)
+    # two-pass load: header first, then only the columns detection can use,
+    # with the date column parsed during the read
+    header = pd.read_csv(p, encoding="utf-8", nrows=0)
+    keep, date_col = _columns_to_load(list(header.columns))
+    if not keep:
+        return pd.read_csv(p, encoding="utf-8")
+    return pd.read_csv(
+        p, encoding="utf-8",
+        usecols=lambda c: c in keep,
+        parse_dates=[date_col] if date_col else False,
+    )
 
 def _norm(s: Optional[str]) -> str:
     return "" if s is None else str(s).strip().lower()
 
-def _norm_series(s: pd.Series) -> pd.Series:
-    return s.astype(str).str.strip().str.lower()
-
 def _label_from_region_flag_col(colname: str) -> str:
     # colname like "region_north western" -> "North Western"
     label = colname[len("region_"):].strip()
@@ -57,6 +120,42 @@ def _label_from_region_flag_col(colname: str) -> str:
             return v
     return label
 
+# rows below this threshold decode faster via argmax than a JIT-compiled kernel
+_NUMBA_DECODE_MIN_ROWS = 1_000_000
+_decode_kernel = None
+
+def _decode_onehot_codes(active: np.ndarray) -> np.ndarray:
+    """Index of the first active flag per row (-1 when none is set).
+
+    Very large flag matrices go through a parallel Numba kernel that writes
+    int8 codes directly instead of materializing argmax/any intermediates;
+    otherwise (or without numba installed) plain NumPy does the job.
+    """
+    global _decode_kernel
+    if len(active) >= _NUMBA_DECODE_MIN_ROWS:
+        try:
+            if _decode_kernel is None:
+                from numba import njit, prange
+
+                @njit(parallel=True, cache=True)
+                def kernel(flags):
+                    n, k = flags.shape
+                    out = np.full(n, -1, np.int8)
+                    for i in prange(n):
+                        for j in range(k):
+                            if flags[i, j]:
+                                out[i] = j
+                                break
+                    return out
+
+                _decode_kernel = kernel
+            return _decode_kernel(active)
+        except Exception:
+            pass
+    codes = active.argmax(axis=1).astype(np.int8)
+    codes[~active.any(axis=1)] = -1
+    return codes
+
 def _detect_columns_and_prepare(df: pd.DataFrame) -> Tuple[pd.DataFrame, str, str, str, Optional[str], Dict[str, str]]:
     cols = [str(c).strip() for c in df.columns]
     low = [c.lower() for c in cols]
@@ -91,7 +190,8 @@ def _detect_columns_and_prepare(df: pd.DataFrame) -> Tuple[pd.DataFrame, str, st
             region_col = cols[low.index(k)]
             break
 
-    df = df.copy()
+    # note: no defensive copy here — the caller hands over the freshly read frame
+    # and never touches it again, so column assignments can land in place
 
     # --- guard: if chosen region column looks numeric, treat as not a region ---
     if region_col is not None:
@@ -105,17 +205,18 @@ def _detect_columns_and_prepare(df: pd.DataFrame) -> Tuple[pd.DataFrame, str, st
     if region_col is None:
         region_flag_cols = [c for c in cols if c.lower().startswith("region_")]
         if region_flag_cols:
-            def synth_region(row) -> Optional[str]:
-                for c in region_flag_cols:
-                    val = row.get(c)
-                    try:
-                        active = float(val) > 0
-                    except Exception:
-                        active = str(val).strip().lower() in ("1", "true", "yes")
-                    if active:
-                        return _label_from_region_flag_col(c)
-                return None
-            df["region_synth"] = df.apply(synth_region, axis=1)
+            # vectorized one-hot decode: numeric coercion + argmax instead of a per-row apply
+            flags_num = df[region_flag_cols].apply(pd.to_numeric, errors="coerce")
+            active = flags_num.fillna(0).to_numpy() > 0
+            if flags_num.isna().to_numpy().any():
+                # non-numeric flags ("true"/"yes"): handle them column-wise in one pass
+                truthy = df[region_flag_cols].astype(str).apply(
+                    lambda s: s.str.strip().str.lower().isin(["1", "true", "yes"])
+                )
+                active |= flags_num.isna().to_numpy() & truthy.to_numpy()
+            labels = [_label_from_region_flag_col(c) for c in region_flag_cols]
+            codes = _decode_onehot_codes(active)
+            df["region_synth"] = pd.Categorical.from_codes(codes, categories=labels)
             region_col = "region_synth"
 
     if region_col is None:
@@ -144,23 +245,75 @@ def _detect_columns_and_prepare(df: pd.DataFrame) -> Tuple[pd.DataFrame, str, st
 
     # clean rows
     df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
+    # float32 is ample for ~4 significant digits of retail prices and halves scan bandwidth
+    df[price_col] = pd.to_numeric(df[price_col], errors="coerce").astype("float32")
     df = df.dropna(subset=[date_col, price_col, region_col]).reset_index(drop=True)
-    df[region_col] = df[region_col].astype(str).str.strip()
+    # category dtype: ~5 regions / ~3 commodities, so equality filters become int8 code comparisons
+    df[region_col] = df[region_col].astype(str).str.strip().astype("category")
+    if tidy_commodity_col:
+        df[tidy_commodity_col] = df[tidy_commodity_col].astype(str).str.strip().astype("category")
 
     return df.sort_values(date_col).reset_index(drop=True), date_col, price_col, region_col, tidy_commodity_col, wide_map
 
+def _load_prepared_sidecar(src: Path):
+    # use the sidecar only if it is at least as fresh as the source dataset
+    if not (PREPARED_PARQUET.exists() and PREPARED_META.exists()):
+        return None
+    src_mtime = src.stat().st_mtime
+    if PREPARED_PARQUET.stat().st_mtime < src_mtime or PREPARED_META.stat().st_mtime < src_mtime:
+        return None
+    try:
+        meta = json.loads(PREPARED_META.read_text(encoding="utf-8"))
+        return pd.read_parquet(PREPARED_PARQUET), meta
+    except Exception as e:
+        print(f"[WARN] Ignoring prepared sidecar: {e}")
+        return None
+
+def _save_prepared_sidecar(df: pd.DataFrame, meta: Dict) -> None:
+    try:
+        df.to_parquet(PREPARED_PARQUET)
+        PREPARED_META.write_text(json.dumps(meta), encoding="utf-8")
+    except Exception as e:
+        # pyarrow/fastparquet missing or disk issue: not fatal, just no fast restarts
+        print(f"[WARN] Could not write prepared sidecar: {e}")
+
 def _load_dataset() -> None:
     global DF, DATE_COL, PRICE_COL, REGION_COL, TIDY_COMMODITY_COL, WIDE_COMMODITY_MAP
+    global REGION_LOOKUP, COMMODITY_LOOKUP
     last_err = None
     for p in DATA_CANDIDATES:
         if not p.exists():
             continue
         try:
-            raw = _read_any(p)
-            raw.columns = [str(c).strip() for c in raw.columns]
-            df, date_col, price_col, region_col, tidy_col, wide_map = _detect_columns_and_prepare(raw)
+            cached = _load_prepared_sidecar(p)
+            if cached is not None:
+                df, meta = cached
+                date_col, price_col, region_col = meta["date_col"], meta["price_col"], meta["region_col"]
+                tidy_col, wide_map = meta["tidy_commodity_col"], meta["wide_commodity_map"]
+            else:
+                raw = _read_any(p)
+                raw.columns = [str(c).strip() for c in raw.columns]
+                df, date_col, price_col, region_col, tidy_col, wide_map = _detect_columns_and_prepare(raw)
+                _save_prepared_sidecar(df, {
+                    "date_col": date_col, "price_col": price_col, "region_col": region_col,
+                    "tidy_commodity_col": tidy_col, "wide_commodity_map": wide_map,
+                })
+            # DF is immutable after load: normalize the category labels once so
+            # per-request filtering is a plain categorical equality, not a string pass
+            REGION_LOOKUP = {_norm(v): v for v in df[region_col].cat.categories}
+            COMMODITY_LOOKUP = {_norm(v): v for v in df[tidy_col].cat.categories} if tidy_col else {}
             DF, DATE_COL, PRICE_COL, REGION_COL = df, date_col, price_col, region_col
             TIDY_COMMODITY_COL, WIDE_COMMODITY_MAP = tidy_col, dict(wide_map)
+            # commodity flag columns are static: coerce them to boolean masks once
+            WIDE_MASKS.clear()
+            for friendly, col in WIDE_COMMODITY_MAP.items():
+                if col not in df.columns:
+                    continue
+                s = pd.to_numeric(df[col], errors="coerce")
+                if s.notna().any():
+                    WIDE_MASKS[friendly] = (s.fillna(0) > 0).to_numpy()
+                else:
+                    WIDE_MASKS[friendly] = df[col].astype(str).str.lower().isin(["1", "true", "yes"]).to_numpy()
             print(
                 f"[INFO] Loaded {len(DF)} rows. "
                 f"date_col={DATE_COL} price_col={PRICE_COL} region_col={REGION_COL} "
@@ -194,67 +347,165 @@ def _filter_by_selection(df: pd.DataFrame, commodity: str, region: str) -> pd.Da
     # commodity
     if TIDY_COMMODITY_COL:
         if commodity and _norm(commodity) != "price":
-            s = _norm_series(out[TIDY_COMMODITY_COL])  # type: ignore
-            out = out[s == _norm(commodity)]
+            label = COMMODITY_LOOKUP.get(_norm(commodity), commodity)
+            out = out[out[TIDY_COMMODITY_COL] == label]
     elif WIDE_COMMODITY_MAP and commodity and _norm(commodity) != "price":
-        col = WIDE_COMMODITY_MAP.get(commodity)
-        if col and col in out.columns:
-            s = pd.to_numeric(out[col], errors="coerce")
-            if s.notna().any():
-                out = out[s.fillna(0) > 0]
-            else:
-                out = out[out[col].astype(str).str.lower().isin(["1", "true", "yes"])]
+        # commodity filtering runs first, so the prebuilt DF-aligned mask applies directly
+        mask = WIDE_MASKS.get(commodity)
+        if mask is not None and len(mask) == len(out):
+            out = out[mask]
 
     # region
     if region and _norm(region) not in ["", "all"]:
-        rs = _norm_series(out[REGION_COL])  # type: ignore
-        out = out[rs == _norm(region)]
+        label = REGION_LOOKUP.get(_norm(region), region)
+        out = out[out[REGION_COL] == label]
 
     return out
 
+# ---- precomputed per-(commodity, region) series ----
+def _series_key(commodity: str, region: str) -> Tuple[str, str]:
+    return (_norm(commodity) or "price", _norm(region) or "all")
+
+def _build_series_entry(commodity: str, region: str) -> Tuple[np.ndarray, np.ndarray]:
+    # DF is sorted by date once during preparation and mask filtering keeps row
+    # order, so subsets need no re-sort: taking the last N months is a plain slice
+    sub = _filter_by_selection(DF, commodity, region)  # type: ignore
+    sub = sub.dropna(subset=[PRICE_COL, DATE_COL])
+    # contiguous float32 buffers: downstream reductions and the forecast fit
+    # operate on dense aligned memory without pandas index overhead
+    return sub[DATE_COL].to_numpy(), sub[PRICE_COL].to_numpy(dtype=np.float32, copy=True)
+
+def _build_columnar_store() -> None:
+    # struct-of-arrays extraction: after this, cache building (and any request
+    # that hits a precomputed key) never touches the DataFrame again
+    global DATES_ARR, PRICES_ARR, REGION_CODES, COMMODITY_CODES, REGION_LABELS, COMMODITY_LABELS
+    DATES_ARR = DF[DATE_COL].to_numpy()  # type: ignore
+    PRICES_ARR = DF[PRICE_COL].to_numpy(dtype=np.float32)  # type: ignore
+    region_cat = DF[REGION_COL].cat  # type: ignore
+    REGION_CODES = region_cat.codes.to_numpy().astype(np.int8)
+    REGION_LABELS = [str(c) for c in region_cat.categories]
+    if TIDY_COMMODITY_COL:
+        commodity_cat = DF[TIDY_COMMODITY_COL].cat  # type: ignore
+        COMMODITY_CODES = commodity_cat.codes.to_numpy().astype(np.int8)
+        COMMODITY_LABELS = [str(c) for c in commodity_cat.categories]
+    else:
+        COMMODITY_CODES, COMMODITY_LABELS = None, []
+
+def _build_series_cache() -> None:
+    # the Cartesian product of commodities x regions is tiny; precompute every
+    # subset once (via int8 code masks on the columnar store) so requests
+    # become dict lookups
+    SERIES_CACHE.clear()
+    FORECAST_CACHE.clear()
+    n = len(PRICES_ARR)  # type: ignore
+    all_rows = np.ones(n, dtype=bool)
+
+    commodity_masks: Dict[str, np.ndarray] = {"price": all_rows}
+    for c in _available_commodities():
+        if TIDY_COMMODITY_COL and COMMODITY_CODES is not None and c in COMMODITY_LABELS:
+            commodity_masks[c] = COMMODITY_CODES == COMMODITY_LABELS.index(c)
+        elif WIDE_COMMODITY_MAP:
+            commodity_masks[c] = WIDE_MASKS.get(c, all_rows)
+        else:
+            commodity_masks[c] = all_rows
+
+    region_masks: Dict[str, np.ndarray] = {"All": all_rows}
+    for i, r in enumerate(REGION_LABELS):
+        region_masks[r] = REGION_CODES == i
+
+    for c, cmask in commodity_masks.items():
+        for r, rmask in region_masks.items():
+            m = cmask & rmask
+            SERIES_CACHE[_series_key(c, r)] = (DATES_ARR[m], PRICES_ARR[m])  # type: ignore
+
+def _series_for(commodity: str, region: str) -> Tuple[np.ndarray, np.ndarray]:
+    key = _series_key(commodity, region)
+    entry = SERIES_CACHE.get(key)
+    if entry is None:
+        # unexpected selection (e.g. unknown commodity): fall back to the old
+        # pandas path without memoizing — caching arbitrary user strings
+        # would let a client grow the dict without bound
+        entry = _build_series_entry(commodity, region)
+    return entry
+
 # ---- helpers: robust forecast and graceful fallback ----
-def _holt_winters_forecast(y: pd.Series, periods: int) -> np.ndarray:
+def _holt_winters_forecast(y: np.ndarray, periods: int) -> np.ndarray:
     # Try HW if we have enough monthly-ish data; otherwise a simple linear drift
-    y = y.dropna().astype(float)
-    if len(y) == 0:
+    y = np.asarray(y, dtype=float)
+    y = y[~np.isnan(y)]
+    if y.size == 0:
         return np.full(periods, np.nan)
 
     try:
         from statsmodels.tsa.holtwinters import ExponentialSmoothing
         if len(y) >= 18:
-            # give statsmodels a plain RangeIndex (avoid frequency warnings)
-            y_hw = y.copy()
-            y_hw.index = pd.RangeIndex(start=0, stop=len(y_hw))
+            # plain ndarray input: statsmodels uses an implicit RangeIndex (no frequency warnings)
+            # heuristic init is O(n) (vs the inner optimization "estimated" runs) and a
+            # capped L-BFGS-B without the brute grid converges fine on short monthly series
             fit = ExponentialSmoothing(
-                y_hw, trend="add", seasonal="add", seasonal_periods=12, initialization_method="estimated"
-            ).fit(optimized=True)
+                y, trend="add", seasonal="add", seasonal_periods=12, initialization_method="heuristic"
+            ).fit(
+                optimized=True, method="L-BFGS-B", use_brute=False,
+                minimize_kwargs={"options": {"maxiter": 50, "ftol": 1e-6}},
+            )
             fc = fit.forecast(periods)
             return np.asarray(fc, dtype=float)
     except Exception:
         pass
 
     # simple fallback: last value + small slope from last 6 steps (if available)
-    last = float(y.iloc[-1])
-    slope = float((y.iloc[-1] - y.iloc[-7]) / 6.0) if len(y) >= 7 else 0.0
-    return np.array([last + slope * (i + 1) for i in range(periods)], dtype=float)
-
-def _subset_or_fallback(commodity: str, region: str) -> Tuple[pd.DataFrame, str, bool]:
+    last = float(y[-1])
+    slope = float((y[-1] - y[-7]) / 6.0) if len(y) >= 7 else 0.0
+    return last + slope * np.arange(1, periods + 1, dtype=np.float64)
+
+def _forecast_for(commodity: str, region: str, prices: np.ndarray, periods: int) -> np.ndarray:
+    # DF is immutable, so the fit is deterministic per (commodity, region):
+    # compute once on first request and memoize. Only keys backed by the
+    # precomputed series cache are stored, so ad-hoc selections cannot grow
+    # the dict without bound.
+    key = _series_key(commodity, region) + (periods,)
+    fc = FORECAST_CACHE.get(key)
+    if fc is None:
+        fc = _holt_winters_forecast(prices, periods)
+        if key[:2] in SERIES_CACHE:
+            FORECAST_CACHE[key] = fc
+    return fc
+
+def _subset_or_fallback(commodity: str, region: str) -> Tuple[np.ndarray, np.ndarray, str, bool]:
     """
-    Returns (subset_df, used_region, did_fallback)
+    Returns (dates, prices, used_region, did_fallback)
     - falls back to 'All' (i.e., ignore region) if the regional subset has no usable price data.
     """
-    sub = _filter_by_selection(DF, commodity, region)  # type: ignore
-    sub = sub.dropna(subset=[PRICE_COL, DATE_COL])
-    if not sub.empty and sub[PRICE_COL].notna().any():
-        return sub.sort_values(DATE_COL), region, False
+    dates, prices = _series_for(commodity, region)
+    if prices.size:
+        return dates, prices, region, False
 
     # fallback to aggregate across regions
-    agg = _filter_by_selection(DF, commodity, "All")  # type: ignore
-    agg = agg.dropna(subset=[PRICE_COL, DATE_COL])
-    return agg.sort_values(DATE_COL), "All", True
+    dates, prices = _series_for(commodity, "All")
+    return dates, prices, "All", True
+
+def _build_static_payloads() -> None:
+    # /health and /options inputs never change after load; compute them once
+    global HEALTH_PAYLOAD, OPTIONS_PAYLOAD
+    regions = sorted(DF[REGION_COL].dropna().astype(str).unique())  # type: ignore
+    commodities = _available_commodities()
+    HEALTH_PAYLOAD = {
+        "date_col": DATE_COL,
+        "price_col": PRICE_COL,
+        "region_col": REGION_COL,
+        "regions_present": regions,
+        "commodities_present": commodities,
+        "mode": "tidy" if TIDY_COMMODITY_COL else ("wide" if WIDE_COMMODITY_MAP else "single"),
+    }
+    ordered_regions = [r for r in CANON_REGIONS_ORDER if r in regions]
+    for r in regions:
+        if r not in ordered_regions:
+            ordered_regions.append(r)
+    OPTIONS_PAYLOAD = {"commodities": commodities, "regions": ["All"] + ordered_regions}
 
 # --------------- API ----------------
-app = FastAPI()
+# orjson serializes at C speed; matters most for the /series list of point dicts
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # ---- CORS (Vercel + Localhost) ----
 extra_origins = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "").split(",") if o.strip()]
@@ -278,42 +529,29 @@ def root():
 
 @app.get("/health")
 def health():
-    return {
-        "ok": DF is not None,
-        "rows": 0 if DF is None else len(DF),
-        "date_col": DATE_COL,
-        "price_col": PRICE_COL,
-        "region_col": REGION_COL,
-        "regions_present": [] if DF is None else sorted(DF[REGION_COL].astype(str).unique()),
-        "commodities_present": _available_commodities(),
-        "mode": "tidy" if TIDY_COMMODITY_COL else ("wide" if WIDE_COMMODITY_MAP else "single"),
-    }
+    return {"ok": DF is not None, "rows": 0 if DF is None else len(DF), **HEALTH_PAYLOAD}
 
 @app.get("/options")
 def options():
-    commodities = _available_commodities()
-    regions = [] if DF is None else sorted(DF[REGION_COL].dropna().astype(str).unique())
-    ordered_regions = [r for r in CANON_REGIONS_ORDER if r in regions]
-    for r in regions:
-        if r not in ordered_regions:
-            ordered_regions.append(r)
-    return {"commodities": commodities, "regions": ["All"] + ordered_regions}
+    return OPTIONS_PAYLOAD
 
 @app.get("/series")
 def series(commodity: str = Query("price"), region: str = Query("All"), months: int = Query(18)):
-    sub, used_region, did_fallback = _subset_or_fallback(commodity, region)
+    dates, prices, used_region, did_fallback = _subset_or_fallback(commodity, region)
     if months and months > 0:
-        sub = sub.tail(months)
-    pts = [{"date": pd.to_datetime(d).date().isoformat(), "y": float(v)}
-           for d, v in zip(sub[DATE_COL], sub[PRICE_COL])]
+        dates, prices = dates[-months:], prices[-months:]
+    # batch isoformat + tolist: no per-element pd.to_datetime/.date() calls
+    dates_iso = np.datetime_as_string(dates, unit="D").tolist()
+    ys = prices.tolist()
+    pts = [{"date": d, "y": y} for d, y in zip(dates_iso, ys)]
     return {"points": pts, "used_region": used_region, "fallback": did_fallback}
 
 @app.get("/predict")
 def predict(commodity: str, region: str = Query("All"), horizon: int = Query(1)):
-    sub, used_region, did_fallback = _subset_or_fallback(commodity, region)
+    dates, prices, used_region, did_fallback = _subset_or_fallback(commodity, region)
 
     # if still nothing, return a benign 200 with nulls so UI can render gracefully
-    if sub.empty or sub[PRICE_COL].dropna().empty:
+    if prices.size == 0:
         return {
             "commodity": commodity,
             "region": region,
@@ -332,23 +570,31 @@ def predict(commodity: str, region: str = Query("All"), horizon: int = Query(1))
             },
         }
 
-    current_price = float(sub[PRICE_COL].iloc[-1])
-    last_date = pd.to_datetime(sub[DATE_COL].iloc[-1])
-    fc6 = _holt_winters_forecast(sub[PRICE_COL], 6)
-    fdates = [(last_date + pd.DateOffset(months=i)).date().isoformat() for i in range(1, 7)]
-
-    def pct(v):
-        return None if (v is None or not np.isfinite(v) or abs(current_price) < 1e-9) else (float(v) - current_price) / current_price * 100.0
+    current_price = float(prices[-1])
+    last_date = pd.to_datetime(dates[-1])
+    fc6 = _forecast_for(commodity, used_region, prices, 6)
+    # offset each horizon from the anchor: cumulative DateOffset steps lose
+    # month-end anchoring (2024-01-31 -> 2024-02-29 -> 2024-03-29, ...)
+    fdates = [(last_date + pd.DateOffset(months=i)).strftime("%Y-%m-%d") for i in range(1, 7)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pcts = np.where(
+            np.isfinite(fc6) & (abs(current_price) >= 1e-9),
+            (fc6 - current_price) / current_price * 100.0,
+            np.nan,
+        )
+
+    def _val(v) -> Optional[float]:
+        return float(v) if np.isfinite(v) else None
 
     bundle = {
-        "pred_1m": float(fc6[0]) if np.isfinite(fc6[0]) else None,
-        "pred_3m": float(fc6[2]) if np.isfinite(fc6[2]) else None,
-        "pred_6m": float(fc6[5]) if np.isfinite(fc6[5]) else None,
-        "pct_change_1m": pct(fc6[0]),
-        "pct_change_3m": pct(fc6[2]),
-        "pct_change_6m": pct(fc6[5]),
+        "pred_1m": _val(fc6[0]),
+        "pred_3m": _val(fc6[2]),
+        "pred_6m": _val(fc6[5]),
+        "pct_change_1m": _val(pcts[0]),
+        "pct_change_3m": _val(pcts[2]),
+        "pct_change_6m": _val(pcts[5]),
         "future_dates": {"1m": fdates[0], "3m": fdates[2], "6m": fdates[5]},
-        "future_path": [{"date": fdates[i], "forecast": float(fc6[i]) if np.isfinite(fc6[i]) else None} for i in range(6)],
+        "future_path": [{"date": d, "forecast": _val(v)} for d, v in zip(fdates, fc6)],
     }
 
     snap = {1: ("pred_1m", "1m"), 3: ("pred_3m", "3m"), 6: ("pred_6m", "6m")}.get(horizon, ("pred_1m", "1m"))
@@ -368,3 +614,6 @@ def predict(commodity: str, region: str = Query("All"), horizon: int = Query(1))
 
 # Load once
 _load_dataset()
+_build_columnar_store()
+_build_series_cache()
+_build_static_payloads()
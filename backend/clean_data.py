@@ -1,4 +1,4 @@
-﻿# clean_data.py
+# clean_data.py
 # Leakage-safe preparation for SL food prices:
 # - Builds CPI-deflated price (if CPI present)
 # - Creates lags (t-1, t-3), rolling mean (past-only), seasonal dummies, and spatial one-hots
@@ -9,110 +9,20 @@
 #   py .\clean_data.py --in "..\data\SL_food_prices_prepared.csv" --out "..\data\SL_food_prices_clean_noleak.csv" --cpi-col CPI
 
 import argparse
-import re
 from pathlib import Path
 import json
 import numpy as np
 import pandas as pd
 
-# --------- IO helpers ---------
-def smart_read(path: str) -> pd.DataFrame:
-    try:
-        df = pd.read_csv(path, sep=None, engine="python", encoding="utf-8-sig", on_bad_lines="skip")
-        if df.shape[1] == 1:
-            for sep in [",",";","\t","|"]:
-                try:
-                    df2 = pd.read_csv(path, sep=sep, engine="python", encoding="utf-8-sig", on_bad_lines="skip")
-                    if df2.shape[1] > 1:
-                        return df2
-                except Exception:
-                    pass
-        return df
-    except Exception:
-        pass
-    try:
-        return pd.read_excel(path, engine="openpyxl")
-    except Exception:
-        pass
-    for enc in ["latin1", "cp1252"]:
-        try:
-            return pd.read_csv(path, sep=None, engine="python", encoding=enc, on_bad_lines="skip")
-        except Exception:
-            continue
-    raise RuntimeError(f"Could not read file: {path}")
-
-def detect_date_column(df: pd.DataFrame) -> pd.Series:
-    for c in ["date","Date","period","month_year","obs_date","time","dt"]:
-        if c in df.columns:
-            s = pd.to_datetime(df[c], errors="coerce")
-            if s.notna().any():
-                return s.dt.to_period("M").dt.start_time
-    for c in df.columns:
-        if df[c].dtype == object:
-            smp = df[c].astype(str).head(20)
-            if smp.str.contains(r"^\d{4}[-/]\d{1,2}$").any():
-                s = pd.to_datetime(df[c].astype(str) + "-01", errors="coerce")
-                if s.notna().any():
-                    return s.dt.to_period("M").dt.start_time
-    lower = {x.lower(): x for x in df.columns}
-    ycol = next((lower[k] for k in ["year","yr","yyyy"] if k in lower), None)
-    mcol = next((lower[k] for k in ["month","mn","mm"] if k in lower), None)
-    if ycol and mcol:
-        s = pd.to_datetime({"year": pd.to_numeric(df[ycol], errors="coerce"),
-                            "month": pd.to_numeric(df[mcol], errors="coerce"),
-                            "day": 1}, errors="coerce")
-        if s.notna().any():
-            return s.dt.to_period("M").dt.start_time
-    for c in df.columns:
-        vals = pd.to_numeric(df[c], errors="coerce")
-        if vals.notna().any() and vals.between(190001,210012, inclusive="both").any():
-            s = pd.to_datetime(vals.astype("Int64").astype(str) + "01", format="%Y%m%d", errors="coerce")
-            if s.notna().any():
-                return s.dt.to_period("M").dt.start_time
-    return pd.Series(pd.NaT, index=df.index)
-
-def build_commodity(df: pd.DataFrame) -> str:
-    for c in ["commodity","item","product","commodity_name"]:
-        if c in df.columns:
-            df[c] = df[c].astype(str)
-            return c
-    onehots = [c for c in df.columns if c.lower().startswith("commodity_")]
-    if onehots:
-        def get_name(row):
-            cols = [c for c in onehots if pd.notna(row[c]) and float(row[c]) == 1.0]
-            return (cols[0].split("commodity_",1)[-1].strip() if cols else "Unknown")
-        df["commodity"] = df.apply(get_name, axis=1).astype(str)
-        return "commodity"
-    df["commodity"] = "Commodity"
-    return "commodity"
-
-def build_market(df: pd.DataFrame) -> str:
-    for c in ["market","region","district","location","city","pop_region","area","market_name","region_name"]:
-        if c in df.columns:
-            df[c] = df[c].astype(str)
-            return c
-    region_oh = [c for c in df.columns if c.lower().startswith(("region_","market_","district_"))]
-    if region_oh:
-        def get_region(row):
-            cols = [c for c in region_oh if pd.notna(row[c]) and float(row[c]) == 1.0]
-            raw = cols[0] if cols else "Unknown"
-            for pref in ["region_","market_","district_"]:
-                if raw.lower().startswith(pref):
-                    return raw[len(pref):]
-            return raw
-        df["market"] = df.apply(get_region, axis=1).astype(str)
-        return "market"
-    df["market"] = "All-Markets"
-    return "market"
-
-def choose_price(df: pd.DataFrame) -> str:
-    if "price_sll" in df.columns:
-        return "price_sll"
-    for c in df.columns:
-        lc = c.lower()
-        if "price" in lc and "_lag" not in lc and "_roll" not in lc:
-            return c
-    raise RuntimeError("No price column found (need a column containing 'price').")
+from _ingest import (
+    smart_read,
+    _month_start,
+    detect_date_column,
+    build_commodity,
+    build_market,
+    choose_price,
+    lag_features,
+)
 
 # --------- CPI deflation ---------
 def make_real_price(df: pd.DataFrame, price_col: str, cpi_col: str | None) -> pd.Series:
@@ -128,92 +38,102 @@ def make_real_price(df: pd.DataFrame, price_col: str, cpi_col: str | None) -> pd
         # CPI ~ chain-linked (around 1-3)
         return p / cpi
 
-# --------- Group-safe engineering ---------
-def winsorize_changes(g: pd.DataFrame, price_series: pd.Series, limits=(0.01, 0.99)) -> pd.Series:
-    """Conservative winsorization on MoM % changes, using only past info."""
-    p = pd.to_numeric(price_series, errors="coerce")
-    chg = p.pct_change()  # uses t-1 -> no future info
-    lo, hi = chg.quantile(limits[0]), chg.quantile(limits[1])
-    chg_clip = chg.clip(lower=lo, upper=hi)
-    base = p.iloc[0]
-    path = (1 + chg_clip).fillna(1.0).cumprod() * base
-    return path  # smoothed path (still based only on past info up to t)
+def onehot_int8(s: pd.Series, prefix: str, drop_first: bool = True) -> pd.DataFrame:
+    """One-hot block built straight from categorical codes into int8.
+
+    pd.get_dummies materializes a dense column per category; writing the codes
+    into a preallocated int8 matrix gives the same block at 1/8th the memory.
+    """
+    cat = s.astype("category")
+    codes = cat.cat.codes.to_numpy()
+    cats = list(cat.cat.categories)
+    start = 1 if drop_first else 0
+    oh = np.zeros((len(codes), max(len(cats) - start, 0)), dtype=np.int8)
+    mask = codes >= start
+    oh[np.flatnonzero(mask), codes[mask] - start] = 1
+    return pd.DataFrame(oh, columns=[f"{prefix}_{c}" for c in cats[start:]], index=s.index)
 
+# --------- Group-safe engineering ---------
 def make_features_targets(df: pd.DataFrame, price_col: str, add_spatial=True, add_seasonal=True) -> pd.DataFrame:
-    df = df.sort_values(["commodity","market","date"]).copy()
-
-    def per_group(g: pd.DataFrame) -> pd.DataFrame:
-        g = g.sort_values("date").copy()
-        p = pd.to_numeric(g[price_col], errors="coerce")
-        ps = winsorize_changes(g, p)
-
-        # Required lags and rolling (PAST ONLY)
-        g["lag1"] = p.shift(1)
-        g["lag3"] = p.shift(3)
-        # rolling mean over previous 3 months; exclude current by shifting before rolling
-        g["roll3_mean"] = p.shift(1).rolling(3, min_periods=3).mean()
-
-        # Future level targets (for model training files)
-        g["target_1m"] = p.shift(-1)
-        g["target_3m"] = p.shift(-3)
-        g["target_6m"] = p.shift(-6)
-
-        # Seasonals
-        g["month"] = g["date"].dt.month.astype(int)
-        if add_seasonal:
-            m_d = pd.get_dummies(g["month"], prefix="m", drop_first=True)
-            g = pd.concat([g, m_d], axis=1)
-
-        return g
-
-    out = df.groupby(["commodity","market"], group_keys=False).apply(per_group)
+    df = df.sort_values(["commodity","market","date"], kind="mergesort")
+
+    # Per-(commodity, market) lags/rolling/targets with no Python call per
+    # group. shift=1 on the roll excludes the current month (PAST ONLY).
+    lags, rolls, targets = lag_features(df, "commodity", "market", price_col,
+                                        lags=(1, 3), rolls=((3, 1),), targets=(1, 3, 6))
+    df["lag1"] = lags[1]
+    df["lag3"] = lags[3]
+    df["roll3_mean"] = rolls[(3, 1)]
+    # Future level targets (for model training files)
+    df["target_1m"] = targets[1]
+    df["target_3m"] = targets[3]
+    df["target_6m"] = targets[6]
+
+    # Trim rows with incomplete past windows now, so the dummy expansion
+    # below only touches rows that survive (targets stay optional)
+    df = df.dropna(subset=["lag1","lag3","roll3_mean"])
+
+    # Seasonals
+    df["month"] = df["date"].dt.month.astype(int)
+    month_d_cols: list[str] = []
+    if add_seasonal:
+        m_d = onehot_int8(df["month"], prefix="m", drop_first=True)
+        month_d_cols = m_d.columns.tolist()
+        df = pd.concat([df, m_d], axis=1)
+
+    out = df
 
     # Spatial one-hots
+    region_cols: list[str] = []
     if add_spatial:
-        reg_d = pd.get_dummies(out["market"].astype("category"), prefix="region", drop_first=True)
+        reg_d = onehot_int8(out["market"], prefix="region", drop_first=True)
+        region_cols = reg_d.columns.tolist()
         out = pd.concat([out, reg_d], axis=1)
 
-    # Keep only rows with full past for features (avoid leakage)
-    needed_feats = ["lag1","lag3","roll3_mean"]
-    out = out.dropna(subset=needed_feats).copy()
-
     # Select final columns (targets kept for training convenience)
     base_cols = ["date","commodity","market", price_col, "lag1","lag3","roll3_mean","month"]
-    month_d_cols = [c for c in out.columns if re.fullmatch(r"m_\d+", c)]
-    region_cols = [c for c in out.columns if c.startswith("region_")]
     target_cols = ["target_1m","target_3m","target_6m"]
     keep = base_cols + month_d_cols + region_cols + target_cols
 
-    return out[keep].sort_values(["commodity","market","date"]).reset_index(drop=True)
+    # rows are still in the ingest sort order: concat/dropna preserve it
+    return out[keep].reset_index(drop=True)
 
-def main(in_path: str, out_path: str, cpi_col: str | None):
+def main(in_path: str, out_path: str, cpi_col: str | None, fp32: bool = True, csv: bool = False):
     raw = smart_read(in_path)
 
     # 1) date
     dt = detect_date_column(raw)
     if dt.isna().all():
         raise RuntimeError("Could not detect/construct a monthly date column.")
-    raw["date"] = pd.to_datetime(dt).dt.to_period("M").dt.start_time
+    raw["date"] = _month_start(pd.to_datetime(dt))
 
     # 2) commodity & market
     comm_col = build_commodity(raw)
     mkt_col  = build_market(raw)
     raw = raw.rename(columns={comm_col: "commodity", mkt_col: "market"})
-    raw["commodity"] = raw["commodity"].astype(str).str.strip()
-    raw["market"]    = raw["market"].astype(str).str.strip()
+    raw["commodity"] = raw["commodity"].astype(str).str.strip().astype("category")
+    raw["market"]    = raw["market"].astype(str).str.strip().astype("category")
 
     # 3) price (nominal), then real price if CPI present
     price_nom = choose_price(raw)
     raw[price_nom] = pd.to_numeric(raw[price_nom], errors="coerce")
     raw["price_real"] = make_real_price(raw, price_nom, cpi_col)
+    if fp32:
+        # float32 halves the footprint of the price and every derived column
+        raw["price_real"] = raw["price_real"].astype(np.float32)
 
     clean = make_features_targets(raw[["date","commodity","market","price_real"]].copy(), "price_real",
                                   add_spatial=True, add_seasonal=True)
 
-    # Save output
+    # Save output; Parquet is the default (faster write, smaller file,
+    # column-prunable reads), CSV stays behind --csv
     out_p = Path(out_path)
     out_p.parent.mkdir(parents=True, exist_ok=True)
-    clean.to_csv(out_p, index=False, encoding="utf-8")
+    if csv:
+        clean.to_csv(out_p, index=False, encoding="utf-8", float_format="%.4f")
+    else:
+        out_p = out_p.with_suffix(".parquet")
+        clean.to_parquet(out_p, engine="pyarrow", compression="zstd")
 
     # Save the feature list for inference alignment (drop identifiers & targets)
     feature_cols = [c for c in clean.columns
@@ -227,10 +147,105 @@ def main(in_path: str, out_path: str, cpi_col: str | None):
     print("Columns:", list(clean.columns))
     print("Features saved to:", feat_path)
 
+def main_polars(in_path: str, out_path: str, cpi_col: str | None, fp32: bool = True, csv: bool = False):
+    """Streaming polars pipeline for inputs that already carry tidy columns.
+
+    Runs the whole lag/rolling/target computation as a LazyFrame so datasets
+    larger than RAM can stream through. Needs explicit date/commodity/market/
+    price columns — one-hot encoded inputs still go through the pandas path.
+    """
+    import polars as pl
+
+    lf = pl.scan_csv(in_path, infer_schema_length=10_000)
+    schema = lf.collect_schema()
+    names = schema.names()
+
+    date_c = next((c for c in ["date","Date","period","month_year","obs_date","time","dt"] if c in names), None)
+    comm_c = next((c for c in ["commodity","item","product","commodity_name"] if c in names), None)
+    mkt_c = next((c for c in ["market","region","district","location","city","pop_region","area","market_name","region_name"] if c in names), None)
+    price_c = "price_sll" if "price_sll" in names else next(
+        (c for c in names if "price" in c.lower() and "_lag" not in c.lower() and "_roll" not in c.lower()), None)
+    if not (date_c and comm_c and mkt_c and price_c):
+        raise RuntimeError("--engine polars needs explicit date/commodity/market/price columns; "
+                           "use the default pandas engine for one-hot encoded inputs")
+
+    date_expr = pl.col(date_c)
+    if schema[date_c] == pl.String:
+        date_expr = date_expr.str.to_datetime(strict=False)
+    date_expr = date_expr.cast(pl.Datetime).dt.truncate("1mo").cast(pl.Date)
+
+    price = pl.col(price_c).cast(pl.Float64, strict=False)
+    if cpi_col and cpi_col in names:
+        cpi = pl.col(cpi_col).cast(pl.Float64, strict=False)
+        price = pl.when(cpi.median() > 10).then(price / (cpi / 100.0)).otherwise(price / cpi)
+    if fp32:
+        price = price.cast(pl.Float32)
+
+    keys = ["commodity", "market"]
+    lf = lf.select(
+        date_expr.alias("date"),
+        pl.col(comm_c).cast(pl.String).str.strip_chars().alias("commodity"),
+        pl.col(mkt_c).cast(pl.String).str.strip_chars().alias("market"),
+        price.alias("price_real"),
+    ).sort([*keys, "date"], maintain_order=True)
+
+    p = pl.col("price_real")
+    lf = lf.with_columns(
+        p.shift(1).over(keys).alias("lag1"),
+        p.shift(3).over(keys).alias("lag3"),
+        # past-only rolling mean: shift before rolling, as in the pandas path
+        p.shift(1).rolling_mean(3).over(keys).alias("roll3_mean"),
+        p.shift(-1).over(keys).alias("target_1m"),
+        p.shift(-3).over(keys).alias("target_3m"),
+        p.shift(-6).over(keys).alias("target_6m"),
+        pl.col("date").dt.month().cast(pl.Int64).alias("month"),
+    )
+
+    # dummy categories come from the full frame, matching onehot_int8
+    months = sorted(lf.select(pl.col("month").unique()).collect()["month"].to_list())
+    markets = sorted(lf.select(pl.col("market").unique()).collect()["market"].to_list())
+    month_d_cols = [f"m_{m}" for m in months[1:]]
+    region_cols = [f"region_{m}" for m in markets[1:]]
+    lf = lf.with_columns(
+        *[(pl.col("month") == m).cast(pl.Int8).alias(f"m_{m}") for m in months[1:]],
+        *[(pl.col("market") == m).cast(pl.Int8).alias(f"region_{m}") for m in markets[1:]],
+    ).drop_nulls(["lag1", "lag3", "roll3_mean"])
+
+    keep = (["date","commodity","market","price_real","lag1","lag3","roll3_mean","month"]
+            + month_d_cols + region_cols + ["target_1m","target_3m","target_6m"])
+    out = lf.select(keep).collect(engine="streaming")
+
+    out_p = Path(out_path)
+    out_p.parent.mkdir(parents=True, exist_ok=True)
+    if csv:
+        out.write_csv(out_p, float_precision=4)
+    else:
+        out_p = out_p.with_suffix(".parquet")
+        out.write_parquet(out_p, compression="zstd")
+
+    feature_cols = [c for c in out.columns
+                    if c not in {"date","commodity","market","price_real","target_1m","target_3m","target_6m"}]
+    feat_path = out_p.with_suffix(".features.json")
+    feat_path.write_text(json.dumps(feature_cols, indent=2), encoding="utf-8")
+
+    print("[OK] Saved:", out_p)
+    print("Rows:", out.height)
+    print("Columns:", out.columns)
+    print("Features saved to:", feat_path)
+
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--in", dest="in_path", required=True, help="Input CSV/XLSX path")
-    ap.add_argument("--out", dest="out_path", required=True, help="Output CSV path")
+    ap.add_argument("--out", dest="out_path", required=True,
+                    help="Output path (suffix becomes .parquet unless --csv)")
     ap.add_argument("--cpi-col", dest="cpi_col", default=None, help="CPI column name (optional)")
+    ap.add_argument("--fp32", dest="fp32", action="store_true", default=True,
+                    help="store prices and derived features as float32 (default)")
+    ap.add_argument("--fp64", dest="fp32", action="store_false",
+                    help="keep full float64 precision")
+    ap.add_argument("--csv", action="store_true", help="write legacy CSV instead of Parquet")
+    ap.add_argument("--engine", choices=["pandas", "polars"], default="pandas",
+                    help="polars streams the pipeline lazily for larger-than-RAM inputs")
     args = ap.parse_args()
-    main(args.in_path, args.out_path, args.cpi_col)
+    runner = main_polars if args.engine == "polars" else main
+    runner(args.in_path, args.out_path, args.cpi_col, fp32=args.fp32, csv=args.csv)
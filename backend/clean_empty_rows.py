@@ -1,3 +1,4 @@
+import codecs
 import sys
 import pandas as pd
 from pathlib import Path
@@ -7,6 +8,31 @@ from pathlib import Path
 # Example:
 #   py clean_empty_rows.py ..\data\Food_Price_Cleaned_IQR_filled.csv ..\data\Food_Price_Cleaned_noempty.csv
 
+# Typed read: the C parser writes straight into these dtypes instead of
+# inferring object columns first. Extra keys are ignored for files that
+# lack a column.
+DTYPES = {
+    "date": "string",
+    "region": "category",
+    "market": "category",
+    "commodity": "category",
+    "price_sll": "float32",
+}
+
+def detect_encoding(path: Path) -> str:
+    """Pick an encoding by decoding the first 64 KB once, not by re-reading."""
+    sample = path.open("rb").read(65536)
+    for enc in ("utf-8", "cp1252"):
+        try:
+            # incremental decode with final=False tolerates a multibyte
+            # character cut in half at the end of the sample
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        # utf-8-sig strips a BOM if present and is otherwise plain utf-8
+        return "utf-8-sig" if enc == "utf-8" else enc
+    return "latin1"
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: py clean_empty_rows.py <input_csv> [output_csv]")
@@ -15,24 +41,28 @@ def main():
     inp = Path(sys.argv[1])
     out = Path(sys.argv[2]) if len(sys.argv) > 2 else inp.with_name(inp.stem + "_noempty.csv")
 
-    # Load with robust encodings
-    last_err = None
-    for enc in ("utf-8", "utf-8-sig", "cp1252", "latin1"):
-        try:
-            df = pd.read_csv(inp, encoding=enc)
-            break
-        except Exception as e:
-            last_err = e
-    else:
-        raise RuntimeError(f"Could not read {inp} ({last_err})")
+    # Single typed read; na_values absorbs the junk markers the old code
+    # replaced in a second pass
+    try:
+        df = pd.read_csv(inp, encoding=detect_encoding(inp), engine="c",
+                         dtype=DTYPES, na_values=["", "nan", "None"])
+    except Exception as e:
+        raise RuntimeError(f"Could not read {inp} ({e})")
 
     original = len(df)
 
-    # Normalize common text columns (trim spaces) if present
+    # Normalize common text columns (trim spaces) if present. These were read
+    # as categoricals, so trimming runs once per category instead of per row.
     for col in ["region", "market", "commodity"]:
         if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-            df[col].replace({"": pd.NA, "nan": pd.NA, "None": pd.NA}, inplace=True)
+            s = df[col]
+            try:
+                s = s.cat.rename_categories(s.cat.categories.str.strip())
+            except ValueError:
+                # two categories collapse to the same trimmed value
+                s = s.astype(str).str.strip().astype("category")
+            s = s.where(~s.isin(["", "nan", "None"]))
+            df[col] = s.cat.remove_unused_categories()
 
     # Drop rows that are completely empty
     df = df.dropna(how="all")
@@ -15,20 +15,38 @@ TARGETS = [
     "commodity_rice (imported)",
 ]
 
-def cols_for(h, df):
-    return {t: f"{t}_lead{h}" for t in TARGETS if f"{t}_lead{h}" in df.columns}
+def cols_for(h, names):
+    return {t: f"{t}_lead{h}" for t in TARGETS if f"{t}_lead{h}" in names}
+
+def read_train(p: Path, h: int):
+    """Load a training file, preferring a Parquet sibling with column pruning."""
+    pq = p.with_suffix(".parquet")
+    if pq.exists():
+        import pyarrow.parquet as papq
+        names = papq.read_schema(pq).names
+        present = cols_for(h, names)
+        cols = [c for c in ["region", *present.values()] if c in names]
+        return pd.read_parquet(pq, columns=cols), present
+    names = pd.read_csv(p, nrows=0).columns
+    present = cols_for(h, names)
+    usecols = [c for c in ["region", *present.values()] if c in names]
+    return pd.read_csv(p, usecols=usecols), present
 
 for h, p in FILES.items():
-    if not p.exists():
+    if not (p.exists() or p.with_suffix(".parquet").exists()):
         print(f"[MISSING] {h}M file: {p}")
         continue
-    df = pd.read_csv(p)
+    df, present = read_train(p, h)
     if "region" not in df.columns:
         print(f"[WARN] {p.name} has no 'region' column.")
         continue
-    present = cols_for(h, df)
     print(f"\n=== {h}M: {p.name} ===")
-    print("Targets found:", list(present.values()))
-    for reg, g in df.groupby("region", dropna=False):
-        ok = [c for c in present.values() if c in g.columns and g[c].notna().sum() >= 8]
-        print(f"  - {reg}: {len(g)} rows, targets with >=8 non-NA rows: {ok}")
+    cols = list(present.values())
+    print("Targets found:", cols)
+    # one C-level reduction instead of re-slicing the frame per region
+    gb = df.groupby("region", dropna=False)
+    counts = gb[cols].count()
+    sizes = gb.size()
+    for reg in counts.index:
+        ok = counts.columns[counts.loc[reg].ge(8)].tolist()
+        print(f"  - {reg}: {sizes[reg]} rows, targets with >=8 non-NA rows: {ok}")